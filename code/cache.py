@@ -34,7 +34,13 @@ class AbstractCache:
     def get(self, pair):
         raise NotImplementedError
 
+    def get_many(self, pairs):
+        raise NotImplementedError
+
     def insert(self, pair, avgScoreA, avgScoreB, stdevA, stdevB, firstRoundHistory, roundResultsStr):
+        self.insert_many([(pair, avgScoreA, avgScoreB, stdevA, stdevB, firstRoundHistory, roundResultsStr)])
+
+    def insert_many(self, rows):
         raise NotImplementedError
     
     def pair_paths(self, pair):
@@ -102,7 +108,7 @@ class SQLiteCache(AbstractCache):
                 unpacked.get("avgScoreB"),
                 unpacked.get("stdevA"),
                 unpacked.get("stdevB"),
-                numpy.array(unpacked.get("firstRoundHistory")),
+                numpy.array(unpacked.get("firstRoundHistory"), dtype=numpy.int8),
                 unpacked.get("roundResultsStr"),)  # This is a tuple.
 
     def get(self, pair):
@@ -124,25 +130,66 @@ class SQLiteCache(AbstractCache):
                                 (hashA, hashB, pair[0], pair[1])).fetchone()
             return self._load(res) if res else False
 
-    def insert(self, pair, avgScoreA, avgScoreB, stdevA, stdevB, firstRoundHistory, roundResultsStr):
-        mod = self.get_last_modified(pair)
+    def get_many(self, pairs):
+        # Pick the matching row for each pair from the metadata alone,
+        # then only read the results of the rows that were picked
+        rows = {}
+        for rowid, moduleA, moduleB, timestamp, hashA, hashB in self.cur.execute(
+                "SELECT rowid, moduleA, moduleB, timestamp, hashA, hashB FROM cache"):
+            rows.setdefault((moduleA, moduleB), []).append((rowid, timestamp, hashA, hashB))
+
+        hashes = {}
+        chosen = {}
+        for pair in pairs:
+            candidates = rows.get(tuple(pair))
+            if not candidates:
+                continue
 
-        renc = {
-            "avgScoreA": avgScoreA,
-            "avgScoreB": avgScoreB,
-            "stdevA": stdevA,
-            "stdevB": stdevB,
-            "firstRoundHistory": firstRoundHistory.tolist(),
-            "roundResultsStr": roundResultsStr
-        }
-        rstr = base64.b64encode(pickle.dumps(renc))
+            mod = self.get_last_modified(pair)
+            res = next((c for c in candidates if c[1] >= mod), None)
+            if res is None:
+                pathA, pathB = self.pair_paths(pair)
+                if pathA not in hashes:
+                    hashes[pathA] = hash_file(pathA)
+                if pathB not in hashes:
+                    hashes[pathB] = hash_file(pathB)
+
+                res = next((c for c in candidates if c[2] == hashes[pathA] and c[3] == hashes[pathB]), None)
+            if res is not None:
+                chosen[res[0]] = pair
+
+        results = {}
+        rowids = list(chosen)
+        # Stay under SQLite's limit on the number of query parameters
+        for i in range(0, len(rowids), 500):
+            batch = rowids[i:i + 500]
+            for rowid, result in self.cur.execute(
+                    f"SELECT rowid, result FROM cache WHERE rowid IN ({', '.join('?' * len(batch))})", batch):
+                results[chosen[rowid]] = self._load((result,))
+        return results
+
+    def insert_many(self, rows):
+        values = []
+        for pair, avgScoreA, avgScoreB, stdevA, stdevB, firstRoundHistory, roundResultsStr in rows:
+            mod = self.get_last_modified(pair)
+
+            renc = {
+                "avgScoreA": avgScoreA,
+                "avgScoreB": avgScoreB,
+                "stdevA": stdevA,
+                "stdevB": stdevB,
+                "firstRoundHistory": firstRoundHistory.tolist(),
+                "roundResultsStr": roundResultsStr
+            }
+            rstr = base64.b64encode(pickle.dumps(renc))
 
-        pathA, pathB = self.pair_paths(pair)
+            pathA, pathB = self.pair_paths(pair)
 
-        hashA = hash_file(pathA)
-        hashB = hash_file(pathB)
-        self.cur.execute("INSERT INTO cache (moduleA, moduleB, result, timestamp, hashA, hashB)"
-                         "VALUES(?, ?, ?, ?, ?, ?)", (pair[0], pair[1], rstr, mod, hashA, hashB))
+            hashA = hash_file(pathA)
+            hashB = hash_file(pathB)
+            values.append((pair[0], pair[1], rstr, mod, hashA, hashB))
+        self.cur.executemany("INSERT INTO cache (moduleA, moduleB, result, timestamp, hashA, hashB)"
+                             "VALUES(?, ?, ?, ?, ?, ?)", values)
 
     def close(self):
         self.cur.close()
@@ -156,7 +203,6 @@ class JSONCache(AbstractCache):
     def __init__(self, args, **kwargs):
         file = args.cache_file
         self.cache = file if file != "" else self.default
-        self.lock = kwargs.get("lock")
 
     def setup(self):
         pass
@@ -176,7 +222,7 @@ class JSONCache(AbstractCache):
                         result.get("avgScoreB"),
                         result.get("stdevA"),
                         result.get("stdevB"),
-                        numpy.array(result.get("firstRoundHistory")),
+                        numpy.array(result.get("firstRoundHistory"), dtype=numpy.int8),
                         result.get("roundResultsStr"),)  # This is a tuple.
         except FileNotFoundError:
             return False
@@ -185,38 +231,62 @@ class JSONCache(AbstractCache):
         except json.JSONDecodeError:
             return False
 
-    def insert(self, pair, avgScoreA, avgScoreB, stdevA, stdevB, firstRoundHistory, roundResultsStr):
-        self.lock.acquire()
+    def get_many(self, pairs):
         try:
+            with open(self.cache, "r") as file:
+                cache = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+        entries = {}
+        for x in cache:
+            entries.setdefault((x.get("moduleA"), x.get("moduleB")), []).append(x)
+
+        results = {}
+        for pair in pairs:
+            candidates = entries.get(tuple(pair))
+            if not candidates:
+                continue
+
             mod = self.get_last_modified(pair)
-            try:
-                with open(self.cache, "r") as file:
-                    cache = json.loads(file.read())
-            except json.JSONDecodeError:
-                cache = list()
-            except FileNotFoundError:
-                cache = list()
-
-            with open(self.cache, "w") as file:
-                renc = {
-                    "avgScoreA": avgScoreA,
-                    "avgScoreB": avgScoreB,
-                    "stdevA": stdevA,
-                    "stdevB": stdevB,
-                    "firstRoundHistory": firstRoundHistory.tolist(),
-                    "roundResultsStr": roundResultsStr
-                }
-
-                cache.append({
-                    "result": renc,
-                    "moduleA": pair[0],
-                    "moduleB": pair[1],
-                    "timestamp": mod
-                })
-
-                file.write(json.dumps(cache))
-        finally:
-            self.lock.release()
+            result = next((x.get("result") for x in candidates if x.get("timestamp") >= mod), None)
+            if result is not None:
+                results[pair] = (result.get("avgScoreA"),
+                                 result.get("avgScoreB"),
+                                 result.get("stdevA"),
+                                 result.get("stdevB"),
+                                 numpy.array(result.get("firstRoundHistory"), dtype=numpy.int8),
+                                 result.get("roundResultsStr"),)  # This is a tuple.
+        return results
+
+    def insert_many(self, rows):
+        try:
+            with open(self.cache, "r") as file:
+                cache = json.loads(file.read())
+        except json.JSONDecodeError:
+            cache = list()
+        except FileNotFoundError:
+            cache = list()
+
+        for pair, avgScoreA, avgScoreB, stdevA, stdevB, firstRoundHistory, roundResultsStr in rows:
+            renc = {
+                "avgScoreA": avgScoreA,
+                "avgScoreB": avgScoreB,
+                "stdevA": stdevA,
+                "stdevB": stdevB,
+                "firstRoundHistory": firstRoundHistory.tolist(),
+                "roundResultsStr": roundResultsStr
+            }
+
+            cache.append({
+                "result": renc,
+                "moduleA": pair[0],
+                "moduleB": pair[1],
+                "timestamp": self.get_last_modified(pair)
+            })
+
+        with open(self.cache, "w") as file:
+            file.write(json.dumps(cache))
 
     def close(self):
         pass
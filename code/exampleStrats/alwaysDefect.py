@@ -1,2 +1,6 @@
 def strategy(history, memory):
     return 0, None
+
+
+def strategy_jit(history, memory):
+    return 0
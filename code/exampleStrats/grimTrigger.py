@@ -17,3 +17,10 @@ def strategy(history, memory):
         return 0, True
     else:
         return 1, False
+
+
+# The same strategy for the numba runner, with memory[0] set once Grim Trigger has been wronged.
+def strategy_jit(history, memory):
+    if memory[0] == 0 and history.shape[1] >= 1 and history[1, -1] == 0:
+        memory[0] = 1
+    return 0 if memory[0] else 1
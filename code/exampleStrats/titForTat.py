@@ -5,3 +5,9 @@ def strategy(history, memory):
     ):  # Choose to defect if and only if the opponent just defected.
         choice = 0
     return choice, None
+
+
+def strategy_jit(history, memory):
+    if history.shape[1] >= 1 and history[1, -1] == 0:
+        return 0
+    return 1
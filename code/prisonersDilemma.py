@@ -1,8 +1,8 @@
-import multiprocessing
 import os
 import itertools
 import importlib
 import time
+import copy
 
 import cache as cachelib
 
@@ -10,11 +10,21 @@ import numpy as np
 import random
 from multiprocessing import Pool, cpu_count
 from io import StringIO
-import statistics
 import argparse
 import sys
 import json
 
+try:
+    from numba import njit, types
+    from numba.core.errors import NumbaError
+except ImportError:
+    njit = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 parser = argparse.ArgumentParser(description="Run the Prisoner's Dilemma simulation.")
 parser.add_argument(
     "-n",
@@ -118,12 +128,22 @@ RESULTS_HTML = "results.html"
 RESULTS_JSON = "results.json"
 SUMMARY_FILE = "summary.txt"
 PROFILE_FILE = "profile.txt"
+PROFILE_JSON = "profile.json"
 NUM_RUNS = args.num_runs
+CACHE_BATCH_SIZE = 64
+MAX_CHUNK_SIZE = 16  # Most pairings handed to a worker at once
+PROGRESS_INTERVAL = 0.1  # Minimum seconds between progress bar updates
+DET_PROBE_TURNS = 32
+# After the probe only every DET_CHECK_EVERY-th turn is replayed. Strategies that use the global
+# random or np.random generators get every turn replayed, but ones with their own generator
+# (random.Random(), np.random.default_rng()) that rarely deviate can go unnoticed.
+DET_CHECK_EVERY = 16
 
 pointsArray = [
     [1, 5],
     [0, 3],
 ]  # The i-j-th element of this array is how many points you receive if you do play i, and your opponent does play j.
+POINTS = np.array(pointsArray, dtype=np.int32)
 moveLabels = ["D", "C"]
 # D = defect,     betray,       sabotage,  free-ride,     etc.
 # C = cooperate,  stay silent,  comply,    upload files,  etc.
@@ -136,6 +156,75 @@ def strategyMove(move):
         return move
 
 
+# Strategy functions that have been caught writing to their history
+writingStrategies = set()
+
+
+def callStrategy(strategy, history, turn, memory, buffer):
+    # Pass a read-only view of the history so that players cannot rewrite it
+    view = history[:, :turn]
+    view.flags.writeable = False
+    if strategy not in writingStrategies:
+        try:
+            return strategy(view, memory)
+        except ValueError as e:
+            if "read-only" not in str(e):
+                raise
+            writingStrategies.add(strategy)
+    # Strategies that write to their history get a scratch copy instead
+    scratch = buffer[:, :turn]
+    np.copyto(scratch, view)
+    return strategy(scratch, memory)
+
+
+if njit is not None:
+    # Strategies can export a strategy_jit(history, memory) written in the subset of Python that numba compiles.
+    # It gets an int64 memory array of JIT_MEMORY_SIZE zeros at the start of each game and returns its move.
+    JIT_MEMORY_SIZE = 8
+    JIT_STRATEGY_SIGNATURE = types.int64(types.Array(types.int64, 2, "A"), types.Array(types.int64, 1, "C"))
+    JIT_STRATEGY_TYPE = types.FunctionType(JIT_STRATEGY_SIGNATURE)
+
+    # Taking the strategies as first-class functions compiles (and caches) this once for every pair
+    @njit(
+        types.Tuple((types.float64, types.float64, types.Array(types.int64, 2, "C")))(
+            JIT_STRATEGY_TYPE, JIT_STRATEGY_TYPE, types.int64
+        ),
+        cache=True,
+    )
+    def runRoundJIT(strategyA, strategyB, length):
+        history = np.zeros((2, length), dtype=np.int64)
+        historyFlipped = history[::-1]
+        memoryA = np.zeros(JIT_MEMORY_SIZE, dtype=np.int64)
+        memoryB = np.zeros(JIT_MEMORY_SIZE, dtype=np.int64)
+        scoreA = 0
+        scoreB = 0
+        for turn in range(length):
+            playerAmove = 1 if strategyA(history[:, :turn], memoryA) else 0
+            playerBmove = 1 if strategyB(historyFlipped[:, :turn], memoryB) else 0
+            history[0, turn] = playerAmove
+            history[1, turn] = playerBmove
+            scoreA += POINTS[playerAmove, playerBmove]
+            scoreB += POINTS[playerBmove, playerAmove]
+        return scoreA / length, scoreB / length, history
+
+# Compiled strategy_jit functions by module name, or None for ones that failed to compile
+jitStrategies = {}
+
+def jitStrategy(module):
+    # The compiled strategy_jit of a module, or None if it doesn't have one, it doesn't compile
+    # or numba isn't installed
+    if njit is None or not hasattr(module, "strategy_jit"):
+        return None
+    name = module.__name__
+    if name not in jitStrategies:
+        try:
+            jitStrategies[name] = njit(JIT_STRATEGY_SIGNATURE, cache=True)(module.strategy_jit)
+        except NumbaError as e:
+            sys.stderr.write(f"{name}.strategy_jit failed to compile, using strategy instead: {type(e).__name__}\n")
+            jitStrategies[name] = None
+    return jitStrategies[name]
+
+
 def runRound(moduleA, moduleB):
     memoryA = None
     memoryB = None
@@ -145,91 +234,145 @@ def runRound(moduleA, moduleB):
     LENGTH_OF_GAME = int(
         200 - 40 * np.log(1-random.random())
     )
+
+    # Games between two compiled strategies are played entirely by numba
+    jitA = jitStrategy(moduleA)
+    jitB = jitStrategy(moduleB)
+    if jitA is not None and jitB is not None:
+        return runRoundJIT(jitA, jitB, LENGTH_OF_GAME)
+
     history = np.zeros((2, LENGTH_OF_GAME), dtype=int)
-    historyFlipped = np.zeros((2,LENGTH_OF_GAME),dtype=int)
+    # Player B sees the same history with the rows swapped
+    historyFlipped = history[::-1]
+    bufferA = np.empty_like(history)
+    bufferB = np.empty_like(historyFlipped)
+    strategyA = moduleA.strategy
+    strategyB = moduleB.strategy
 
     for turn in range(LENGTH_OF_GAME):
-        # Copy history so that players cannot rewrite it
-        playerAmove, memoryA = moduleA.strategy(history[:,:turn].copy(),memoryA)
-        playerBmove, memoryB = moduleB.strategy(historyFlipped[:,:turn].copy(),memoryB)
+        playerAmove, memoryA = callStrategy(strategyA, history, turn, memoryA, bufferA)
+        playerBmove, memoryB = callStrategy(strategyB, historyFlipped, turn, memoryB, bufferB)
         history[0, turn] = strategyMove(playerAmove)
         history[1, turn] = strategyMove(playerBmove)
-        historyFlipped[0,turn] = history[1,turn]
-        historyFlipped[1,turn] = history[0,turn]
-
-    return history
-
-turnChances = []
 
-def turnChance(x,summing=False):
-    if x == 0:
-        return 1/40
-    if summing:
-        S = turnChance(x-1,True)
-        return (1-S)/40+S
-    return (1-turnChance(x-1,True))/40
+    scoreA, scoreB = tallyRoundScores(history)
+    return scoreA, scoreB, history
 
-for i in range(DETERMINISTIC_TURNS-199):
-    turnChances.append(turnChance(i))
+# Every turn after the 199th ends the game with a 1/40 chance,
+# so the game ends on turn 200+k with probability (39/40)^k / 40
+TURN_CHANCES = (39/40) ** np.arange(DETERMINISTIC_TURNS - 199) / 40
 
 # this is so that deterministic algorithms still get 3 points for always Coop,
 # instead of 2.999
-chancesSum = sum(turnChances)
-turnChances = [i/chancesSum for i in turnChances]
+TURN_CHANCES /= TURN_CHANCES.sum()
 
-def runDeterministic(moduleA, moduleB):
+# Number of turns played by the end of each turn a game can end on
+GAME_LENGTHS = np.arange(200, DETERMINISTIC_TURNS + 1)
+
+def rngState():
+    # Strategies that draw random numbers advance one of these generators
+    npState = np.random.get_state()
+    return random.getstate(), npState[1].tobytes(), npState[2:]
+
+
+def playDeterministic(moduleA, moduleB, checkEvery=DET_CHECK_EVERY, copyMemory=True):
     memoryA = None
     memoryB = None
     memoryA2 = None
     memoryB2 = None
 
     history = np.zeros((2,DETERMINISTIC_TURNS),dtype=int)
-    historyFlipped = np.zeros((2,DETERMINISTIC_TURNS),dtype=int)
+    historyFlipped = history[::-1]
+    bufferA = np.empty_like(history)
+    bufferB = np.empty_like(historyFlipped)
+    strategyA = moduleA.strategy
+    strategyB = moduleB.strategy
+    rng = rngState()
 
     for turn in range(DETERMINISTIC_TURNS):
-        playerAmove, memoryA = moduleA.strategy(history[:,:turn].copy(),memoryA)
-        playerBmove, memoryB = moduleB.strategy(historyFlipped[:,:turn].copy(),memoryB)
+        # Replay the first DET_PROBE_TURNS turns and every checkEvery turns after that from a copy
+        # of each player's memory, and make sure that both players make the same move again.
+        # Random strategies almost always give themselves away during the probe.
+        check = turn < DET_PROBE_TURNS or turn % checkEvery == 0
+        if check and copyMemory:
+            try:
+                memoryA2 = copy.deepcopy(memoryA)
+                memoryB2 = copy.deepcopy(memoryB)
+            except (TypeError, copy.Error):
+                # Memory that can't be copied gets a second, independent game checked on every turn instead
+                return playDeterministic(moduleA, moduleB, 1, False)
+
+        playerAmove, memoryA = callStrategy(strategyA, history, turn, memoryA, bufferA)
+        playerBmove, memoryB = callStrategy(strategyB, historyFlipped, turn, memoryB, bufferB)
         history[0, turn] = strategyMove(playerAmove)
         history[1, turn] = strategyMove(playerBmove)
 
-        playerAmove2, memoryA2 = moduleA.strategy(history[:,:turn].copy(),memoryA2)
-        playerBmove2, memoryB2 = moduleB.strategy(historyFlipped[:,:turn].copy(),memoryB2)
+        if check:
+            playerAmove2, memoryA2 = callStrategy(strategyA, history, turn, memoryA2, bufferA)
+            playerBmove2, memoryB2 = callStrategy(strategyB, historyFlipped, turn, memoryB2, bufferB)
 
-        if strategyMove(playerAmove2) != strategyMove(playerAmove):
-            return False
-        if strategyMove(playerBmove2) != strategyMove(playerBmove):
-            return False
+            if strategyMove(playerAmove2) != strategyMove(playerAmove):
+                return None
+            if strategyMove(playerBmove2) != strategyMove(playerBmove):
+                return None
 
-        historyFlipped[0,turn] = history[1,turn]
-        historyFlipped[1,turn] = history[0,turn]
+    # Drawing random numbers doesn't always make a strategy's moves random,
+    # but it could have changed them on turns that weren't replayed, so replay them all
+    if checkEvery > 1 and rngState() != rng:
+        return playDeterministic(moduleA, moduleB, 1)
 
-    totals = [0,0]
-    scores = [0,0]
+    return history
 
-    for turn in range(199):
-        scores[0] += pointsArray[history[0,turn]][history[1,turn]]
-        scores[1] += pointsArray[history[1,turn]][history[0,turn]]
 
-    for turn in range(199,DETERMINISTIC_TURNS):
-        scores[0] += pointsArray[history[0,turn]][history[1,turn]]
-        scores[1] += pointsArray[history[1,turn]][history[0,turn]]
+def runDeterministic(moduleA, moduleB):
+    jitA = jitStrategy(moduleA)
+    jitB = jitStrategy(moduleB)
+    if jitA is not None and jitB is not None:
+        # Compiled strategies can't be replayed turn by turn, so play the whole game twice instead
+        _, _, history = runRoundJIT(jitA, jitB, DETERMINISTIC_TURNS)
+        _, _, history2 = runRoundJIT(jitA, jitB, DETERMINISTIC_TURNS)
+        if not np.array_equal(history, history2):
+            return False
+    else:
+        history = playDeterministic(moduleA, moduleB)
+        if history is None:
+            return False
 
-        totals[0] += scores[0]/(turn+1)*turnChances[turn-199]
-        totals[1] += scores[1]/(turn+1)*turnChances[turn-199]
+    # Average score after each possible final turn, weighted by the chance of the game ending there
+    points = POINTS[history, history[::-1]]
+    averages = points.cumsum(axis=1)[:, 199:] / GAME_LENGTHS
+    totals = (averages * TURN_CHANCES).sum(axis=1).tolist()
 
     return totals, history
 
 
+if njit is not None:
+    @njit(cache=True)
+    def _tally(history, points):
+        scoreA = 0
+        scoreB = 0
+        roundLength = history.shape[1]
+        for turn in range(roundLength):
+            playerAmove = history[0, turn]
+            playerBmove = history[1, turn]
+            scoreA += points[playerAmove, playerBmove]
+            scoreB += points[playerBmove, playerAmove]
+        return scoreA / roundLength, scoreB / roundLength
+
+    # Compile once at import so the tournament itself doesn't pay for it.
+    _tally(np.zeros((2, 1), dtype=int), POINTS)
+else:
+    def _tally(history, points):
+        playerAmoves = history[0]
+        playerBmoves = history[1]
+        roundLength = history.shape[1]
+        scoreA = points[playerAmoves, playerBmoves].sum()
+        scoreB = points[playerBmoves, playerAmoves].sum()
+        return scoreA / roundLength, scoreB / roundLength
+
+
 def tallyRoundScores(history):
-    scoreA = 0
-    scoreB = 0
-    roundLength = history.shape[1]
-    for turn in range(roundLength):
-        playerAmove = history[0, turn]
-        playerBmove = history[1, turn]
-        scoreA += pointsArray[playerAmove][playerBmove]
-        scoreB += pointsArray[playerBmove][playerAmove]
-    return scoreA / roundLength, scoreB / roundLength
+    return _tally(history, POINTS)
 
 
 def outputRoundResults(f, pair, roundHistory, scoresA, scoresB, stdevA, stdevB):
@@ -256,48 +399,75 @@ def progressBar(width, completion):
     return f"[{'=' * numCompleted}{' ' * (width - numCompleted)}]"
 
 
-def runRounds(pair):
-    # If round results are cached, return the cached results instead
-    if args.cache:
-        cache = cachelib.get_backend(args, lock=lock)
-        r = cache.get(pair)
-        if r:
-            cache.close()
-            return True, *r, 0
+# Imported strategy modules by name. pool_init gives each worker a fresh one
+moduleCache = {}
+
+def loadStrategy(name):
+    # Each worker imports a strategy once and reuses it for every pairing
+    module = moduleCache.get(name)
+    if module is None:
+        module = moduleCache[name] = importlib.import_module(name)
+    return module
+
 
+def jsonDefault(obj):
+    # NumPy values that json (and orjson, for non-contiguous arrays) can't serialize by themselves
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def writeJson(obj, file):
+    # Serialize straight into the file instead of building the whole string first
+    if orjson is not None:
+        file.flush()
+        file.buffer.write(orjson.dumps(obj, default=jsonDefault, option=orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        json.dump(obj, file, default=jsonDefault)
+
+
+def printProgress(done, total, hits):
+    sys.stdout.write(
+        f"\r{done}/{total} pairings ({NUM_RUNS} runs per pairing, {hits} hits, {done-hits} misses) {progressBar(50, done / total)}"
+    )
+    sys.stdout.flush()
+
+
+def runRounds(pair):
     startTime = time.time()
 
-    allScoresA = []
-    allScoresB = []
     firstRoundHistory = None
 
-    moduleA = importlib.import_module(pair[0])
-    moduleB = importlib.import_module(pair[1])
+    moduleA = loadStrategy(pair[0])
+    moduleB = loadStrategy(pair[1])
 
     deterministic = runDeterministic(moduleA, moduleB)
 
     if deterministic:
-        allScoresA = [deterministic[0][0]]
-        allScoresB = [deterministic[0][1]]
-        firstRoundHistory = deterministic[1]
+        allScoresA = np.array([deterministic[0][0]])
+        allScoresB = np.array([deterministic[0][1]])
+        firstRoundHistory = deterministic[1].astype(np.int8)
     else:
+        allScoresA = np.empty(NUM_RUNS)
+        allScoresB = np.empty(NUM_RUNS)
         for i in range(NUM_RUNS):
-            roundHistory = runRound(moduleA, moduleB)
-            scoresA, scoresB = tallyRoundScores(roundHistory)
+            scoresA, scoresB, roundHistory = runRound(moduleA, moduleB)
             if i == 0:
-                firstRoundHistory = roundHistory
-            allScoresA.append(scoresA)
-            allScoresB.append(scoresB)
+                firstRoundHistory = roundHistory.astype(np.int8)
+            allScoresA[i] = scoresA
+            allScoresB[i] = scoresB
 
-    avgScoreA = statistics.mean(allScoresA)
-    avgScoreB = statistics.mean(allScoresB)
+    avgScoreA = float(allScoresA.mean())
+    avgScoreB = float(allScoresB.mean())
 
     endTime = time.time()
 
-    # Standard deviation throws an error with <2 data points (run with -n1).
+    # Sample standard deviation is undefined with <2 data points (run with -n1).
     # In that case, set it to 0 instead.
-    stdevA = statistics.stdev(allScoresA) if len(allScoresA) > 1 else 0
-    stdevB = statistics.stdev(allScoresB) if len(allScoresB) > 1 else 0
+    stdevA = float(allScoresA.std(ddof=1)) if len(allScoresA) > 1 else 0
+    stdevB = float(allScoresB.std(ddof=1)) if len(allScoresB) > 1 else 0
 
     roundResults = StringIO()
     outputRoundResults(
@@ -307,16 +477,32 @@ def runRounds(pair):
     roundResultsStr = roundResults.getvalue()
     roundResults.close()
 
-    if args.cache:
-        cache.insert(pair, avgScoreA, avgScoreB, stdevA, stdevB, firstRoundHistory, roundResultsStr)
-        cache.close()
+    return pair, (False, avgScoreA, avgScoreB, stdevA, stdevB, firstRoundHistory, roundResultsStr, endTime - startTime)
+
+
+def pool_init(jitFailures):
+    global moduleCache
+    moduleCache = {}
+    # Don't try to compile (and report) these again in every worker
+    for name in jitFailures:
+        jitStrategies[name] = None
+
 
-    return False, avgScoreA, avgScoreB, stdevA, stdevB, firstRoundHistory, roundResultsStr, endTime - startTime
+def flushCache(rows):
+    # Write results to the cache in a single transaction, from the main process only
+    cache = cachelib.get_backend(args)
+    cache.insert_many(rows)
+    cache.close()
+    rows.clear()
 
 
-def pool_init(l):
-    global lock
-    lock = l
+def loadStrategyTimes():
+    # Average seconds per pairing for each strategy, as measured by earlier tournaments
+    try:
+        with open(PROFILE_JSON, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
 
 
 def runFullPairingTournament(inFolders, outFile, summaryFile):
@@ -361,59 +547,108 @@ def runFullPairingTournament(inFolders, outFile, summaryFile):
     numCombinations = len(combinations)
     allResults = []
     strategyTimes = dict((k, 0) for k in STRATEGY_LIST)
-    with Pool(args.processes, initializer=pool_init, initargs=(multiprocessing.Lock(),)) as p:
-        hits = 0
-        for i, result in enumerate(
-            zip(p.imap(runRounds, combinations), combinations), 1
-        ):
-            (
-                cached,
-                avgScoreA,
-                avgScoreB,
-                stdevA,
-                stdevB,
-                firstRoundHistory,
-                roundResultsStr,
-                pairTime
-            ) = result[0]
-
-            if cached:
-                hits += 1
-
-            sys.stdout.write(
-                f"\r{i}/{numCombinations} pairings ({NUM_RUNS} runs per pairing, {hits} hits, {i-hits} misses) {progressBar(50, i / numCombinations)}"
-            )
-            sys.stdout.flush()
-            (nameA, nameB) = result[1]
-            scoresList = [avgScoreA, avgScoreB]
-
-            strategyTimes[nameA] += pairTime
-            strategyTimes[nameB] += pairTime
-
-            allResults.append(
-                {
-                    "playerA": {
-                        "name": nameA,
-                        "avgScore": avgScoreA,
-                        "stdev": stdevA,
-                        "history": firstRoundHistory[0].tolist()
-                    },
-                    "playerB": {
-                        "name": nameB,
-                        "avgScore": avgScoreB,
-                        "stdev": stdevB,
-                        "history": firstRoundHistory[1].tolist()
-                    }
-                }
-            )
-            mainFile.write(roundResultsStr)
-            scoreKeeper[nameA] += avgScoreA
-            scoreKeeper[nameB] += avgScoreB
+    strategyMisses = dict((k, 0) for k in STRATEGY_LIST)
+
+    # Start the slowest pairings first so that they don't hold up the end of the tournament
+    expectedTimes = loadStrategyTimes()
+    pairings = sorted(
+        combinations,
+        key=lambda pair: expectedTimes.get(pair[0], 0) + expectedTimes.get(pair[1], 0),
+        reverse=True,
+    )
+
+    # Look up every pairing in the cache at once, and only send the misses to the pool
+    roundResults = {}
+    if args.cache:
+        for pair, r in cache.get_many(combinations).items():
+            roundResults[pair] = (True, *r, 0)
+        cache.close()
+    hits = len(roundResults)
+    misses = [pair for pair in pairings if pair not in roundResults]
+
+    # Compile every strategy_jit in the main process first, so that one that fails is only reported once
+    jitFailures = []
+    if njit is not None:
+        for name in dict.fromkeys(name for pair in misses for name in pair):
+            module = loadStrategy(name)
+            if hasattr(module, "strategy_jit") and jitStrategy(module) is None:
+                jitFailures.append(name)
+
+    if hits:
+        printProgress(hits, numCombinations, hits)
+
+    pendingInserts = []
+    lastProgress = float("-inf")
+    # Only start the pool if there is something left to run
+    if misses:
+        try:
+            with Pool(args.processes, initializer=pool_init, initargs=(jitFailures,)) as p:
+                # A few chunks per process keeps the pool busy without an IPC round trip per pairing,
+                # but large chunks only come back in bursts, which stalls the progress bar and the cache
+                chunksize = min(MAX_CHUNK_SIZE, max(1, len(misses) // (args.processes * 4)))
+                # Chunks are consecutive slices of the list, so deal the slowest-first pairings out
+                # across them. Otherwise the first chunk would get all of the slowest pairings.
+                numChunks = -(-len(misses) // chunksize)
+                misses = [pair for i in range(numChunks) for pair in misses[i::numChunks]]
+                for i, (pair, result) in enumerate(p.imap_unordered(runRounds, misses, chunksize), hits + 1):
+                    roundResults[pair] = result
+                    if args.cache:
+                        pendingInserts.append((pair, *result[1:7]))
+                        if len(pendingInserts) >= CACHE_BATCH_SIZE:
+                            flushCache(pendingInserts)
+
+                    now = time.monotonic()
+                    if now - lastProgress >= PROGRESS_INTERVAL or i == numCombinations:
+                        printProgress(i, numCombinations, hits)
+                        lastProgress = now
+        finally:
+            # Keep whatever was finished, even if the tournament was interrupted
+            if args.cache and pendingInserts:
+                flushCache(pendingInserts)
+
     sys.stdout.write("\n")
     sys.stdout.flush()
 
-    with open(RESULTS_JSON, "w+") as j:
-        j.write(json.dumps(allResults))
+    for (nameA, nameB) in combinations:
+        (
+            cached,
+            avgScoreA,
+            avgScoreB,
+            stdevA,
+            stdevB,
+            firstRoundHistory,
+            roundResultsStr,
+            pairTime
+        ) = roundResults[(nameA, nameB)]
+
+        strategyTimes[nameA] += pairTime
+        strategyTimes[nameB] += pairTime
+        if not cached:
+            strategyMisses[nameA] += 1
+            strategyMisses[nameB] += 1
+
+        allResults.append(
+            {
+                "playerA": {
+                    "name": nameA,
+                    "avgScore": avgScoreA,
+                    "stdev": stdevA,
+                    "history": firstRoundHistory[0]
+                },
+                "playerB": {
+                    "name": nameB,
+                    "avgScore": avgScoreB,
+                    "stdev": stdevB,
+                    "history": firstRoundHistory[1]
+                }
+            }
+        )
+        mainFile.write(roundResultsStr)
+        scoreKeeper[nameA] += avgScoreA
+        scoreKeeper[nameB] += avgScoreB
+
+    with open(RESULTS_JSON, "w+", encoding="utf-8") as j:
+        writeJson(allResults, j)
 
     scoresNumpy = np.zeros(len(scoreKeeper))
     for i in range(len(STRATEGY_LIST)):
@@ -421,21 +656,23 @@ def runFullPairingTournament(inFolders, outFile, summaryFile):
     rankings = np.argsort(scoresNumpy)
     invRankings = [len(rankings) - int(ranking) - 1 for ranking in np.argsort(rankings)]
 
-    with open("viewer-template.html", "r+") as t:
-        jsonStrategies = [
-            {
-                "name": name,
-                "rank": rank,
-                "score": score,
-                "avgScore": score / (len(STRATEGY_LIST) - 1),
-                "time": time
-            }
-            for (name, rank, score, time) in zip(STRATEGY_LIST, invRankings, scoresNumpy, (strategyTimes[k] for k in STRATEGY_LIST))
-        ]
-        jsonResults = json.dumps({"results": allResults, "strategies": jsonStrategies})
-        templateStr = t.read()
-        with open(RESULTS_HTML, "w+") as out:
-            out.write(templateStr.replace("$results", jsonResults))
+    with open("viewer-template.html", "r", encoding="utf-8") as t:
+        templateHead, templateTail = t.read().split("$results", 1)
+
+    jsonStrategies = [
+        {
+            "name": name,
+            "rank": rank,
+            "score": score,
+            "avgScore": score / (len(STRATEGY_LIST) - 1),
+            "time": time
+        }
+        for (name, rank, score, time) in zip(STRATEGY_LIST, invRankings, scoresNumpy, (strategyTimes[k] for k in STRATEGY_LIST))
+    ]
+    with open(RESULTS_HTML, "w+", encoding="utf-8") as out:
+        out.write(templateHead)
+        writeJson({"results": allResults, "strategies": jsonStrategies}, out)
+        out.write(templateTail)
 
     mainFile.write("\n\nTOTAL SCORES\n")
     for rank in range(len(STRATEGY_LIST)):
@@ -451,6 +688,12 @@ def runFullPairingTournament(inFolders, outFile, summaryFile):
         for strategy, stratTime in strategyTimesSorted:
             profileFile.write(f"{strategy}: {stratTime:.3f} sec\n")
 
+    for strategy in STRATEGY_LIST:
+        if strategyMisses[strategy] > 0:
+            expectedTimes[strategy] = strategyTimes[strategy] / strategyMisses[strategy]
+    with open(PROFILE_JSON, "w+") as profileJson:
+        json.dump(expectedTimes, profileJson)
+
     mainFile.flush()
     mainFile.close()
     summaryFile.flush()